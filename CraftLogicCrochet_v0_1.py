@@ -12,7 +12,11 @@ Navigation (within modes):
 
 from __future__ import annotations
 
+import functools
+import html
 import math
+import struct
+import zlib
 
 
 # ----------------------------
@@ -166,6 +170,40 @@ def ask_size_or_custom(unit_for_custom: str):
         print('Try "throw" or dimensions like "52x68" (or b/q).\n')
 
 
+# ----------------------------
+# Shape selection
+# ----------------------------
+
+def ask_shape():
+    print("\nSHAPE")
+    print("-----")
+    print("Choose a blanket shape:")
+    print("  1 = rectangle")
+    print("  2 = round (uses the shorter side as the diameter)")
+    print("  3 = oval")
+    print("  4 = hexagon")
+    print("  5 = rectangle with rounded corners")
+    print("Type 'b' to go back or 'q' to quit.\n")
+
+    shape_map = {"1": "rectangle", "2": "round", "3": "oval", "4": "hexagon", "5": "rounded"}
+
+    while True:
+        raw = prompt("Choose 1 / 2 / 3 / 4 / 5 (press Enter for rectangle): ")
+
+        if raw == "__BACK__":
+            return "back"
+        if raw == "__QUIT__":
+            return "quit"
+
+        choice = raw.strip()
+        if choice == "":
+            return "rectangle"
+        if choice in shape_map:
+            return shape_map[choice]
+
+        print("Please type 1, 2, 3, 4, or 5 (or b/q).\n")
+
+
 # ----------------------------
 # Border selection + geometry
 # ----------------------------
@@ -182,11 +220,15 @@ def ask_border():
     print("  5 = other / custom (describe it)")
     print("Type 'b' to go back or 'q' to quit.\n")
 
+    # (type, default width in, yardage_factor). The factor is stitch density only
+    # (yarn per square inch vs. the body); the edge shape comes from border_edge_profile.
+    # Shells and picots are worked in the same dc / ch as the body, so they stay at 1.00;
+    # ribbed post stitches stack extra yarn in the fabric.
     style_map = {
         "0": ("none",    0.0, 1.00),
         "1": ("simple",  2.0, 1.00),
-        "2": ("scallop", 2.5, 1.12),
-        "3": ("picot",   1.5, 1.05),
+        "2": ("scallop", 2.5, 1.00),
+        "3": ("picot",   1.5, 1.00),
         "4": ("ribbed",  2.5, 1.15),
         "5": ("custom",  2.0, 1.10),
     }
@@ -275,16 +317,29 @@ def ask_border_included():
         print("Please type 1 or 2 (or b/q).\n")
 
 
-def compute_body_size(width_in: float, height_in: float, border: dict, finished_includes_border: bool):
+def compute_body_size(
+    width_in: float,
+    height_in: float,
+    border: dict,
+    finished_includes_border: bool,
+    shape: str = "rectangle",
+):
     """
     Returns (body_width_in, body_height_in) or None if border makes body impossible.
+    Sizes are the bounding box of the shape (see fit_shape).
     """
+    width_in, height_in = fit_shape(shape, width_in, height_in)
     if (not finished_includes_border) or border["type"] == "none":
         return width_in, height_in
 
     b = border.get("border_in", 0.0)
-    body_w = width_in - (2 * b)
-    body_h = height_in - (2 * b)
+    if shape == "hexagon":
+        # Shrinking the flat-to-flat height by 2b pulls the points in a bit further.
+        body_h = height_in - (2 * b)
+        body_w = body_h * 2 / math.sqrt(3)
+    else:
+        body_w = width_in - (2 * b)
+        body_h = height_in - (2 * b)
 
     if body_w <= 0 or body_h <= 0:
         return None
@@ -293,49 +348,234 @@ def compute_body_size(width_in: float, height_in: float, border: dict, finished_
 
 
 # ----------------------------
-# Yardage + materials
+# Blanket shapes + border profiles
 # ----------------------------
 
-def estimate_yardage_range(width_in: float, height_in: float, border: dict, finished_includes_border: bool):
+SHAPES = ("rectangle", "round", "oval", "hexagon", "rounded")
+ROUNDED_CORNER_IN = 4.0  # corner radius for "rounded" rectangles
+
+# Length of one repeat of the border edge (shell, picot point), in inches.
+BORDER_REPEAT_IN = {"scallop": 2.0, "picot": 0.75}
+PROFILE_SAMPLES = 1024  # samples per repeat for the profile means
+
+
+def fit_shape(shape: str, width_in: float, height_in: float):
     """
-    Rough v1 estimate based on area.
-    Uses the include-border choice to decide whether border adds outside the body.
+    Returns the bounding box (w, h) of the shape drawn inside width × height.
+    - rectangle / rounded / oval fill the box
+    - round uses the shorter side as the diameter
+    - hexagon is regular, flat top and bottom, as tall as will fit
     """
-    border_in = border.get("border_in", 0.0)
-    factor = border.get("yardage_factor", 1.0)
+    if shape in ("rectangle", "rounded", "oval"):
+        return width_in, height_in
+    if shape == "round":
+        d = min(width_in, height_in)
+        return d, d
+    if shape == "hexagon":
+        flats = min(height_in, width_in * math.sqrt(3) / 2)
+        return flats * 2 / math.sqrt(3), flats
+    raise ValueError("Unsupported shape")
+
+
+def border_edge_profile(border_type: str, u: float):
+    """
+    Fraction of the border width reached at phase u (0..1) along one repeat.
+    """
+    if border_type == "scallop":  # shell arcs on a short base band
+        return 0.4 + 0.6 * math.sqrt(max(0.0, 1 - (2 * u - 1) ** 2))
+    if border_type == "picot":  # narrow points on a solid band
+        return 0.75 + 0.25 * max(0.0, 1 - abs(6 * u - 3))
+    return 1.0
+
+
+@functools.lru_cache(maxsize=None)
+def _profile_moments(border_type: str):
+    """
+    (mean(p), mean(p²)) of the edge profile over one repeat, sampled once per style.
+    """
+    n = PROFILE_SAMPLES
+    values = [border_edge_profile(border_type, (i + 0.5) / n) for i in range(n)]
+    return sum(values) / n, sum(v * v for v in values) / n
+
+
+def _corner_radius(shape: str, w: float, h: float):
+    if shape != "rounded":
+        return 0.0
+    return min(ROUNDED_CORNER_IN, w / 2, h / 2)
+
+
+def _shape_area(shape: str, w: float, h: float, corner_r: float = 0.0):
+    if shape in ("rectangle", "rounded"):
+        return w * h - (4 - math.pi) * corner_r * corner_r
+    if shape in ("round", "oval"):
+        return math.pi * (w / 2) * (h / 2)
+    if shape == "hexagon":
+        return (math.sqrt(3) / 2) * h * h
+    raise ValueError("Unsupported shape")
+
+
+def _shape_outline(shape: str, w: float, h: float, corner_r: float = 0.0):
+    """
+    Describes the outline of the shape (bounding box w × h).
+
+    Returns (perimeter, turning, corners):
+      perimeter = outline length
+      turning   = total curvature along the smooth parts (integral of kappa ds)
+      corners   = [(arc_position, exterior_angle), ...] for sharp corners
+    """
+    if shape in ("rectangle", "rounded"):
+        r = corner_r
+        perimeter = 2 * (w + h) - 8 * r + 2 * math.pi * r
+        if r > 0:
+            return perimeter, 2 * math.pi, []
+        return perimeter, 0.0, [(w, math.pi / 2), (w + h, math.pi / 2), (2 * w + h, math.pi / 2), (perimeter, math.pi / 2)]
+    if shape == "hexagon":
+        side = h / math.sqrt(3)
+        return 6 * side, 0.0, [((k + 1) * side, math.pi / 3) for k in range(6)]
+    if shape in ("round", "oval"):
+        a, b = w / 2, h / 2
+        # Ramanujan's second approximation (exact for circles).
+        t = ((a - b) / (a + b)) ** 2
+        perimeter = math.pi * (a + b) * (1 + 3 * t / (10 + math.sqrt(4 - 3 * t)))
+        return perimeter, 2 * math.pi, []
+    raise ValueError("Unsupported shape")
+
+
+@functools.lru_cache(maxsize=1024)
+def _shape_areas(
+    shape: str,
+    width_in: float,
+    height_in: float,
+    border_type: str,
+    border_in: float,
+    finished_includes_border: bool,
+):
+    border = {"type": border_type, "border_in": border_in}
+    body = compute_body_size(width_in, height_in, border, finished_includes_border, shape)
+    if body is None:
+        return None
+    body_w, body_h = body
 
-    if border.get("type") == "none" or border_in <= 0:
-        effective_area = width_in * height_in
+    has_border = border_type != "none" and border_in > 0
+    finished_area = None
+    if has_border and finished_includes_border:
+        # The border sits inside the finished outline, so the body's corners
+        # shrink by the border width and body + border meet the finished edge.
+        finished_w, finished_h = fit_shape(shape, width_in, height_in)
+        finished_r = _corner_radius(shape, finished_w, finished_h)
+        finished_area = _shape_area(shape, finished_w, finished_h, finished_r)
+        corner_r = max(finished_r - border_in, 0.0)
     else:
-        if finished_includes_border:
-            body = compute_body_size(width_in, height_in, border, True)
-            if body is None:
-                return "n/a (border too large)"
-            body_w, body_h = body
-
-            finished_area = width_in * height_in
-            body_area = body_w * body_h
-            border_area = max(finished_area - body_area, 0)
-        else:
-            body_w, body_h = width_in, height_in
-            body_area = body_w * body_h
+        corner_r = _corner_radius(shape, body_w, body_h)
+    body_area = _shape_area(shape, body_w, body_h, corner_r)
+
+    if not has_border:
+        return body_area, 0.0
+
+    # Sweep the border edge profile p outward from the body outline:
+    #   area = w·mean(p)·P + w²·mean(p²)·(integral of kappa ds) / 2 + sum(w² tan(angle / 2)) at corners
+    # The profile wraps in whole repeats, so the integrals reduce to the profile means.
+    # For a flat profile this is exactly the offset-shape area (w·P + 4w² on a rectangle).
+    perimeter, turning, corners = _shape_outline(shape, body_w, body_h, corner_r)
+    repeat = BORDER_REPEAT_IN.get(border_type, 1.0)
+    repeat = perimeter / max(1, round(perimeter / repeat))
+    mean_p, mean_p2 = _profile_moments(border_type)
+
+    strip = border_in * mean_p * perimeter
+    bend = border_in ** 2 * mean_p2 * turning / 2
+    mitre = sum(
+        (border_in * border_edge_profile(border_type, (s / repeat) % 1.0)) ** 2 * math.tan(angle / 2)
+        for s, angle in corners
+    )
+    border_area = strip + bend + mitre
+    if finished_area is not None:
+        # A border at least as wide as a rounded corner leaves the body with
+        # sharp corners; the mitred sweep would fill the finished corner
+        # rounding back in, so cap it at the finished outline.
+        border_area = min(border_area, finished_area - body_area)
+    return body_area, border_area
+
+
+def compute_shape_areas(
+    width_in: float,
+    height_in: float,
+    border: dict,
+    finished_includes_border: bool,
+    shape: str = "rectangle",
+):
+    """
+    Returns (body_area, border_area) in square inches, or None if the border
+    makes the body impossible. Cached per (shape, size, border).
+    """
+    return _shape_areas(
+        shape,
+        float(width_in),
+        float(height_in),
+        border.get("type", "none"),
+        float(border.get("border_in", 0.0)),
+        bool(finished_includes_border),
+    )
 
-            finished_w = body_w + 2 * border_in
-            finished_h = body_h + 2 * border_in
-            finished_area = finished_w * finished_h
-            border_area = max(finished_area - body_area, 0)
 
-        effective_area = body_area + (border_area * 0.7 * factor)
+# ----------------------------
+# Yardage + materials
+# ----------------------------
+
+def estimate_yardage_bounds(
+    width_in: float,
+    height_in: float,
+    border: dict,
+    finished_includes_border: bool,
+    shape: str = "rectangle",
+):
+    """
+    Rough v1 estimate based on area, as numbers: (low_yd, high_yd).
+    Uses the include-border choice to decide whether border adds outside the body;
+    the border area follows the shape's outline and the border's edge profile.
+    border["yardage_factor"] is stitch density only (see ask_border).
+    Returns None if the border makes the body impossible.
+    """
+    areas = compute_shape_areas(width_in, height_in, border, finished_includes_border, shape)
+    if areas is None:
+        return None
+    body_area, border_area = areas
+
+    factor = border.get("yardage_factor", 1.0)
+    effective_area = body_area + (border_area * 0.7 * factor)
 
     low = int(round((effective_area * 0.35) / 50) * 50)
     high = int(round((effective_area * 0.55) / 50) * 50)
-    return f"{max(low,200)}–{max(high,300)} yd"
+    return max(low, 200), max(high, 300)
+
+
+def estimate_yardage_range(
+    width_in: float,
+    height_in: float,
+    border: dict,
+    finished_includes_border: bool,
+    shape: str = "rectangle",
+):
+    """
+    Rough v1 estimate based on area, formatted for display.
+    """
+    bounds = estimate_yardage_bounds(width_in, height_in, border, finished_includes_border, shape)
+    if bounds is None:
+        return "n/a (border too large)"
+    low, high = bounds
+    return f"{low}–{high} yd"
 
 
-def print_materials(width_in: float, height_in: float, border: dict, finished_includes_border: bool):
+def print_materials(
+    width_in: float,
+    height_in: float,
+    border: dict,
+    finished_includes_border: bool,
+    shape: str = "rectangle",
+):
     print("\nMATERIALS")
     print("---------")
     print(f"Finished size entered: {width_in:g} × {height_in:g} in")
+    print(f"Shape: {shape}")
 
     if border["type"] == "none":
         print("Border: none")
@@ -347,14 +587,14 @@ def print_materials(width_in: float, height_in: float, border: dict, finished_in
         print(line)
         print("Finished size includes border:", "yes" if finished_includes_border else "no")
 
-    body = compute_body_size(width_in, height_in, border, finished_includes_border)
+    body = compute_body_size(width_in, height_in, border, finished_includes_border, shape)
     if body is None:
         print("Body size: n/a (border too large)")
         yardage = "n/a"
     else:
         body_w, body_h = body
         print(f"Body size: {body_w:g} × {body_h:g} in")
-        yardage = estimate_yardage_range(width_in, height_in, border, finished_includes_border)
+        yardage = estimate_yardage_range(width_in, height_in, border, finished_includes_border, shape)
 
     print(f"Estimated yardage (v1): {yardage}")
     print("Yarn: Worsted weight (#4)")
@@ -363,20 +603,353 @@ def print_materials(width_in: float, height_in: float, border: dict, finished_in
     print("Optional: stitch markers, measuring tape\n")
 
 
+# ----------------------------
+# Yarn stash allocation
+# ----------------------------
+
+EXACT_MAX_PROJECTS = 12  # per weight/color pool; exact search is exponential
+EXACT_MAX_LOTS = 48  # distinct skein sizes per pool in exact mode
+EXACT_MAX_NODES = 300_000  # search + combination steps per pool before "exact" settles
+MIX_CANDIDATE_LOTS = 8  # biggest lots tried when one project needs two lots
+
+
+def _stash_key(weight: str, color: str):
+    return str(weight).strip().lower(), str(color).strip().lower()
+
+
+def _whole_number(value, field: str, minimum: int):
+    if value != int(value) or value < minimum:
+        raise ValueError(f"{field} must be a whole number of at least {minimum} (got {value!r})")
+    return int(value)
+
+
+def project_yards_needed(project: dict):
+    """
+    Yards to reserve for one project spec (high end of the v1 estimate),
+    or None if the border is too large for the size.
+    """
+    border = project.get("border") or {"type": "none", "border_in": 0.0, "yardage_factor": 1.00}
+    bounds = estimate_yardage_bounds(
+        project["width_in"],
+        project["height_in"],
+        border,
+        project.get("finished_includes_border", True),
+        project.get("shape", "rectangle"),
+    )
+    if bounds is None:
+        return None
+    return bounds[1]
+
+
+def _best_single_lot(yards: int, lots: list, used, first_fit: bool):
+    best = None
+    for i, (per_skein, count) in enumerate(lots):
+        if i in used:
+            continue
+        need = math.ceil(yards / per_skein)
+        if need > count:
+            continue
+        if first_fit:
+            return [(i, need)]
+        key = (need * per_skein - yards, need)
+        if best is None or key < best[0]:
+            best = (key, [(i, need)])
+    return None if best is None else best[1]
+
+
+def _best_lot_pair(yards: int, lots: list, used):
+    """Least-leftover fill from exactly two of the biggest lots, or None."""
+    candidates = sorted(
+        (i for i, (per_skein, count) in enumerate(lots) if count > 0 and i not in used),
+        key=lambda i: -lots[i][0] * lots[i][1],
+    )[:MIX_CANDIDATE_LOTS]
+    best = None
+    for i in candidates:
+        size_i, count_i = lots[i]
+        for j in candidates:
+            if j == i:
+                continue
+            size_j, count_j = lots[j]
+            for a in range(1, min(count_i, math.ceil(yards / size_i) - 1) + 1):
+                b = math.ceil((yards - a * size_i) / size_j)
+                if b > count_j:
+                    continue
+                key = (a * size_i + b * size_j - yards, a + b)
+                if best is None or key < best[0]:
+                    best = (key, [(i, a), (j, b)])
+    return None if best is None else best[1]
+
+
+def _fill_from_lots(yards: int, lots: list, first_fit: bool):
+    """
+    Pick skeins for `yards` from one pool of lots ([yards_per_skein, count],
+    largest skeins first). Returns [(lot_index, skeins), ...] or None.
+
+    Uses as few lots as it can (every lot change is a mid-project skein change),
+    then the least leftover for that number of lots.
+    """
+    single = _best_single_lot(yards, lots, (), first_fit)
+    if single is not None:
+        return single
+    if sum(per_skein * count for per_skein, count in lots) < yards:
+        return None
+
+    # If no two lots can cover it, use up the biggest lot whole and try again.
+    take = {}
+    remaining = yards
+    while True:
+        rest = _best_single_lot(remaining, lots, take, first_fit) or _best_lot_pair(remaining, lots, take)
+        if rest is not None:
+            for i, k in rest:
+                take[i] = take.get(i, 0) + k
+            return sorted(take.items())
+        i = max(
+            (i for i, (per_skein, count) in enumerate(lots) if count > 0 and i not in take),
+            key=lambda i: lots[i][0] * lots[i][1],
+        )
+        take[i] = lots[i][1]
+        remaining -= lots[i][0] * lots[i][1]
+
+
+def _apply_take(lots: list, take: list, sign: int = -1):
+    for i, k in take:
+        lots[i][1] += sign * k
+
+
+def _take_yards(lots: list, take: list):
+    return sum(lots[i][0] * k for i, k in take)
+
+
+def _iter_skein_combos(yards: int, lots: list, budget: list):
+    """
+    Lazily yields every take that covers `yards` without a spare whole skein
+    (dropping any one skein would leave the project short), bigger skeins first.
+
+    Each step of the walk spends one unit of budget[0]; it stops when that runs out.
+    """
+    capacity_from = [0] * (len(lots) + 1)
+    for i in range(len(lots) - 1, -1, -1):
+        capacity_from[i] = capacity_from[i + 1] + lots[i][0] * lots[i][1]
+    take = []
+
+    def walk(i: int, remaining: int, smallest: int):
+        budget[0] -= 1
+        if budget[0] < 0:
+            return
+        if remaining <= 0:
+            if -remaining < smallest:
+                yield list(take)
+            return
+        if capacity_from[i] < remaining:
+            return
+        per_skein, count = lots[i]
+        for k in range(min(count, math.ceil(remaining / per_skein)), 0, -1):
+            take.append((i, k))
+            yield from walk(i + 1, remaining - k * per_skein, per_skein)
+            take.pop()
+            if budget[0] < 0:
+                return
+        yield from walk(i + 1, remaining, smallest)
+
+    return walk(0, yards, 0)
+
+
+def _plan_score(items: list, lots: list, plan: dict):
+    unfilled = sum(1 for take in plan.values() if take is None)
+    leftover = sum(_take_yards(lots, take) - items[j][1] for j, take in plan.items() if take is not None)
+    return unfilled, leftover
+
+
+def _exact_pool(items: list, lots: list, seed: dict):
+    """
+    Branch-and-bound over every skein combination for each project in a small
+    pool, minimizing (unfilled orders, leftover yards).
+
+    Starts from `seed` (a heuristic plan), so the result is never worse than it.
+    Search steps and generated combinations share one budget of EXACT_MAX_NODES;
+    when it runs out the best plan found so far is returned.
+    Returns {index: take or None}.
+    """
+    best = {"score": _plan_score(items, lots, seed), "plan": dict(seed)}
+    order = sorted(range(len(items)), key=lambda j: -items[j][1])
+    plan = {}
+    budget = [EXACT_MAX_NODES]
+
+    def search(pos: int, unfilled: int, leftover: int):
+        budget[0] -= 1
+        if budget[0] < 0 or (unfilled, leftover) >= best["score"]:
+            return
+        if pos == len(order):
+            best["score"] = (unfilled, leftover)
+            best["plan"] = dict(plan)
+            return
+
+        j = order[pos]
+        yards = items[j][1]
+        for take in _iter_skein_combos(yards, lots, budget):
+            waste = _take_yards(lots, take) - yards
+            if (unfilled, leftover + waste) >= best["score"]:
+                continue
+            _apply_take(lots, take)
+            plan[j] = take
+            search(pos + 1, unfilled, leftover + waste)
+            _apply_take(lots, take, sign=1)
+
+        plan[j] = None
+        search(pos + 1, unfilled + 1, leftover)
+        del plan[j]
+
+    search(0, 0, 0)
+    return best["plan"]
+
+
+def _heuristic_pool(items: list, lots: list, method: str):
+    order = range(len(items))
+    if method == "best_fit":
+        order = sorted(order, key=lambda j: items[j][1])
+    plan = {}
+    for j in order:
+        take = _fill_from_lots(items[j][1], lots, first_fit=(method == "greedy"))
+        if take is not None:
+            _apply_take(lots, take)
+        plan[j] = take
+    return plan
+
+
+def allocate_stash(inventory: list, projects: list, method: str = "best_fit"):
+    """
+    Assign skeins from a yarn stash to a queue of blanket projects.
+
+    inventory: [{"weight": "#4", "color": "sage", "yards_per_skein": 200, "count": 12}, ...]
+    projects:  [{"name": "Order 17", "width_in": 50, "height_in": 60,
+                 "shape": "rectangle" (optional), "border": {...} (optional),
+                 "finished_includes_border": True, "weight": "#4", "color": "sage"}, ...]
+
+    Skein sizes and counts must be whole numbers; every project needs a weight and a color.
+
+    method:
+      "greedy"   = queue order, first lot that fits (fastest)
+      "best_fit" = smallest projects first (fills the most orders), fewest lots,
+                   then the least leftover (default)
+      "exact"    = branch-and-bound per weight/color pool, starting from the
+                   best_fit plan (up to EXACT_MAX_PROJECTS projects and
+                   EXACT_MAX_LOTS skein sizes; stops after EXACT_MAX_NODES steps)
+
+    Returns a dict with "assignments", "unfilled", "leftover_yd",
+    "partial_skeins" and the "remaining" inventory.
+    """
+    if method not in ("greedy", "best_fit", "exact"):
+        raise ValueError("Unsupported allocation method")
+
+    # Pool skeins by weight/color, merging lots with the same skein size.
+    pools = {}
+    for item in inventory:
+        per_skein = _whole_number(item["yards_per_skein"], "yards_per_skein", 1)
+        count = _whole_number(item["count"], "count", 0)
+        if count == 0:
+            continue
+        key = _stash_key(item["weight"], item["color"])
+        sizes = pools.setdefault(key, {})
+        sizes[per_skein] = sizes.get(per_skein, 0) + count
+    labels = {_stash_key(i["weight"], i["color"]): (i["weight"], i["color"]) for i in inventory}
+    lots_by_pool = {
+        key: [[per_skein, count] for per_skein, count in sorted(sizes.items(), reverse=True)]
+        for key, sizes in pools.items()
+    }
+
+    assignments = []
+    unfilled = []
+    queued = {}
+    for idx, project in enumerate(projects):
+        name = project.get("name", f"project {idx + 1}")
+        if "weight" not in project or "color" not in project:
+            raise ValueError(f"{name}: projects need a 'weight' and a 'color'")
+        yards = project_yards_needed(project)
+        if yards is None:
+            unfilled.append({"project": name, "yards_needed": None, "reason": "border too large"})
+            continue
+        key = _stash_key(project["weight"], project["color"])
+        if key not in lots_by_pool:
+            unfilled.append({"project": name, "yards_needed": yards, "reason": "no matching yarn"})
+            continue
+        queued.setdefault(key, []).append((name, yards))
+
+    for key, items in queued.items():
+        lots = lots_by_pool[key]
+
+        if method == "exact":
+            if len(items) > EXACT_MAX_PROJECTS:
+                raise ValueError(
+                    f"Exact mode supports up to {EXACT_MAX_PROJECTS} projects per yarn; "
+                    f"got {len(items)} for {labels[key][1]} ({labels[key][0]})"
+                )
+            if len(lots) > EXACT_MAX_LOTS:
+                raise ValueError(
+                    f"Exact mode supports up to {EXACT_MAX_LOTS} skein sizes per yarn; "
+                    f"got {len(lots)} for {labels[key][1]} ({labels[key][0]})"
+                )
+            seed = _heuristic_pool(items, [list(lot) for lot in lots], "best_fit")
+            plan = _exact_pool(items, lots, seed)
+            for take in plan.values():
+                if take is not None:
+                    _apply_take(lots, take)
+        else:
+            plan = _heuristic_pool(items, lots, method)
+
+        for j, (name, yards) in enumerate(items):
+            take = plan[j]
+            if take is None:
+                unfilled.append({"project": name, "yards_needed": yards, "reason": "not enough yarn"})
+                continue
+            allocated = _take_yards(lots, take)
+            assignments.append({
+                "project": name,
+                "weight": labels[key][0],
+                "color": labels[key][1],
+                "yards_needed": yards,
+                "skeins": [{"yards_per_skein": lots[i][0], "count": k} for i, k in take],
+                "yards_allocated": allocated,
+                "leftover_yd": allocated - yards,
+            })
+
+    remaining = []
+    for key, lots in lots_by_pool.items():
+        weight, color = labels[key]
+        for per_skein, count in lots:
+            if count > 0:
+                remaining.append({"weight": weight, "color": color, "yards_per_skein": per_skein, "count": count})
+
+    return {
+        "assignments": assignments,
+        "unfilled": unfilled,
+        "leftover_yd": sum(a["leftover_yd"] for a in assignments),
+        "partial_skeins": sum(1 for a in assignments if a["leftover_yd"] > 0),
+        "remaining": remaining,
+    }
+
+
 # ----------------------------
 # Confirmation
 # ----------------------------
 
-def confirm_selection(unit: str, width_in: float, height_in: float, border: dict, finished_includes_border: bool):
+def confirm_selection(
+    unit: str,
+    width_in: float,
+    height_in: float,
+    border: dict,
+    finished_includes_border: bool,
+    shape: str = "rectangle",
+):
     print("\nCONFIRM SELECTION")
     print("-----------------")
     print(f"Units for custom input: {unit}")
     print(f"Finished size entered: {width_in:g} × {height_in:g} in")
+    print(f"Shape: {shape}")
 
     if border["type"] == "none":
         print("Border: none")
         print("Finished size includes border: n/a")
-        body_w, body_h = width_in, height_in
+        body_w, body_h = fit_shape(shape, width_in, height_in)
     else:
         line = f"Border: {border['type']} ({border['border_in']:g} in)"
         if border["type"] == "custom" and border.get("description"):
@@ -384,7 +957,7 @@ def confirm_selection(unit: str, width_in: float, height_in: float, border: dict
         print(line)
         print("Finished size includes border:", "yes" if finished_includes_border else "no")
 
-        body = compute_body_size(width_in, height_in, border, finished_includes_border)
+        body = compute_body_size(width_in, height_in, border, finished_includes_border, shape)
         if body is None:
             print("\n⚠️ That border is too large for the finished size you entered.")
             print("Try a smaller border width or a larger blanket size.\n")
@@ -634,6 +1207,10 @@ def run_blanket_builder():
             return result
         width_in, height_in, size_mode = result
 
+        shape = ask_shape()
+        if shape in ("back", "quit"):
+            return shape
+
         border = ask_border()
         if border in ("back", "quit"):
             return border
@@ -644,7 +1221,7 @@ def run_blanket_builder():
             if finished_includes_border in ("back", "quit"):
                 return finished_includes_border
 
-        ok = confirm_selection(unit_for_custom, width_in, height_in, border, finished_includes_border)
+        ok = confirm_selection(unit_for_custom, width_in, height_in, border, finished_includes_border, shape)
         if ok == "back":
             continue
         if ok == "quit":
@@ -656,13 +1233,282 @@ def run_blanket_builder():
         print("\nOkay — let’s try again.\n")
 
     print(f"\nSelected: {size_mode}")
-    print_materials(width_in, height_in, border, finished_includes_border)
+    print_materials(width_in, height_in, border, finished_includes_border, shape)
     print_demo_pattern()
 
     _ = prompt("Press Enter to return to the main menu (or q to quit): ")
     return "quit" if _ == "__QUIT__" else "back"
 
 
+# ----------------------------
+# Chart export (tiled)
+# ----------------------------
+
+CHART_PALETTE = ["#f4ecd8", "#7a9e7e", "#c9704a", "#33486b", "#e8b4b8"]
+CHART_GRID_COLOR = "#9a9a9a"
+CHART_GRID_MIN_CELL_PX = 4  # no grid lines on cells smaller than this
+
+
+def _hex_rgb(color: str):
+    c = color.lstrip("#")
+    return int(c[0:2], 16), int(c[2:4], 16), int(c[4:6], 16)
+
+
+def granny_chart(blanket_w_in: float, blanket_h_in: float, square_in: float, palette=None):
+    """
+    Color chart for a granny-square blanket (layout from estimate_square_layout).
+    Each square is drawn as concentric rounds; colors rotate per square.
+    """
+    colors = [_hex_rgb(c) for c in (palette or CHART_PALETTE)]
+    across, down, total, est_w, est_h = estimate_square_layout(blanket_w_in, blanket_h_in, square_in)
+    rounds = estimate_granny_rounds(square_in)
+    n = 2 * rounds  # cells across one square
+
+    def cell_color(col: int, row: int):
+        x, y = col % n, row % n
+        ring = min(x, y, n - 1 - x, n - 1 - y)
+        square = (row // n) * across + (col // n)
+        return colors[(rounds - 1 - ring + square) % len(colors)]
+
+    return {
+        "title": f"Granny squares: {across} × {down} ({total} squares)",
+        "cols": across * n,
+        "rows": down * n,
+        "cell_color": cell_color,
+    }
+
+
+def stitch_chart(
+    body_w_in: float,
+    body_h_in: float,
+    palette=None,
+    stripe_rows: int = 4,
+    sts_per_in: float = 3.5,
+    rows_per_in: float = 2.0,
+):
+    """
+    Stitch-grid chart for a blanket body: one cell per stitch, striped by rows.
+    Default gauge is worsted double crochet (~3.5 sts and ~2 rows per inch).
+    """
+    colors = [_hex_rgb(c) for c in (palette or CHART_PALETTE)]
+    cols = max(1, round(body_w_in * sts_per_in))
+    rows = max(1, round(body_h_in * rows_per_in))
+
+    def cell_color(col: int, row: int):
+        return colors[(row // stripe_rows) % len(colors)]
+
+    return {
+        "title": f"Stitch chart: {cols} sts × {rows} rows",
+        "cols": cols,
+        "rows": rows,
+        "cell_color": cell_color,
+    }
+
+
+def _check_tile_sizes(cell_px: int, tile_px: int):
+    if cell_px <= 0 or tile_px <= 0:
+        raise ValueError("cell_px and tile_px must be positive")
+
+
+def iter_chart_tiles(chart: dict, cell_px: int, tile_px: int):
+    """
+    Yields fixed-size tiles (x, y, width, height) in pixels, row by row.
+    Edge tiles are clipped to the chart.
+    """
+    _check_tile_sizes(cell_px, tile_px)
+    width = chart["cols"] * cell_px
+    height = chart["rows"] * cell_px
+    for y in range(0, height, tile_px):
+        for x in range(0, width, tile_px):
+            yield x, y, min(tile_px, width - x), min(tile_px, height - y)
+
+
+def _render_row_segment(chart: dict, cell_px: int, y: int, x0: int, x1: int):
+    """RGB bytes for pixels x0..x1 of pixel row y (one tile wide at most)."""
+    grid = _hex_rgb(CHART_GRID_COLOR) if cell_px >= CHART_GRID_MIN_CELL_PX else None
+    row = y // cell_px
+    out = bytearray()
+    for col in range(x0 // cell_px, (x1 - 1) // cell_px + 1):
+        start = max(x0, col * cell_px)
+        end = min(x1, (col + 1) * cell_px)
+        color = chart["cell_color"](col, row)
+        if grid and y % cell_px == 0:
+            out += bytes(grid) * (end - start)
+        elif grid and start == col * cell_px:
+            out += bytes(grid) + bytes(color) * (end - start - 1)
+        else:
+            out += bytes(color) * (end - start)
+    return bytes(out)
+
+
+def _iter_cell_runs(chart: dict, cell_px: int, x: int, y: int, w: int, h: int):
+    """
+    Yields (x, y, width, height, rgb) rectangles covering one tile, merging
+    neighbouring cells of the same color along each row.
+    """
+    for row in range(y // cell_px, (y + h - 1) // cell_px + 1):
+        top = max(y, row * cell_px)
+        bottom = min(y + h, (row + 1) * cell_px)
+        run_start, run_color = None, None
+        for col in range(x // cell_px, (x + w - 1) // cell_px + 1):
+            color = chart["cell_color"](col, row)
+            if color != run_color:
+                if run_color is not None:
+                    yield run_start, top, max(x, col * cell_px) - run_start, bottom - top, run_color
+                run_start, run_color = max(x, col * cell_px), color
+        yield run_start, top, x + w - run_start, bottom - top, run_color
+
+
+def _iter_grid_lines(cell_px: int, x: int, y: int, w: int, h: int):
+    """Yields ((x1, y1), (x2, y2)) cell-boundary lines inside one tile."""
+    if cell_px < CHART_GRID_MIN_CELL_PX:
+        return
+    for gx in range(-(-x // cell_px) * cell_px, x + w, cell_px):
+        yield (gx, y), (gx, y + h)
+    for gy in range(-(-y // cell_px) * cell_px, y + h, cell_px):
+        yield (x, gy), (x + w, gy)
+
+
+def _png_chunk(out, kind: bytes, data: bytes):
+    out.write(struct.pack(">I", len(data)))
+    out.write(kind)
+    out.write(data)
+    out.write(struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+
+def export_chart_png(chart: dict, path: str, cell_px: int = 8, tile_px: int = 256):
+    """
+    Streams the chart to a PNG file.
+
+    Each scanline is rendered one tile-width segment at a time and fed straight
+    into the compressor. Scanlines inside a cell row repeat, so segments are
+    reused until the cell row changes; memory stays at about two scanlines.
+    """
+    width = chart["cols"] * cell_px
+    height = chart["rows"] * cell_px
+    _check_tile_sizes(cell_px, tile_px)
+
+    compressor = zlib.compressobj(6)
+    pending = []
+    pending_size = 0
+
+    with open(path, "wb") as out:
+        out.write(b"\x89PNG\r\n\x1a\n")
+        # 8-bit RGB, no interlace
+        _png_chunk(out, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+        segments = {}
+        for y in range(height):
+            if y % cell_px == 0:
+                segments = {}
+            line_kind = y % cell_px == 0  # grid row vs. cell interior
+            pieces = [compressor.compress(b"\x00")]  # filter type: none
+            for x0 in range(0, width, tile_px):
+                key = (line_kind, x0)
+                if key not in segments:
+                    segments[key] = _render_row_segment(chart, cell_px, y, x0, min(x0 + tile_px, width))
+                pieces.append(compressor.compress(segments[key]))
+            for piece in pieces:
+                if piece:
+                    pending.append(piece)
+                    pending_size += len(piece)
+            if pending_size >= 65536:
+                _png_chunk(out, b"IDAT", b"".join(pending))
+                pending, pending_size = [], 0
+
+        pending.append(compressor.flush())
+        _png_chunk(out, b"IDAT", b"".join(pending))
+        _png_chunk(out, b"IEND", b"")
+
+
+def export_chart_svg(chart: dict, path: str, cell_px: int = 8, tile_px: int = 256):
+    """
+    Streams the chart to an SVG file, one <g> group per tile.
+    """
+    _check_tile_sizes(cell_px, tile_px)  # before the file is created
+    width = chart["cols"] * cell_px
+    height = chart["rows"] * cell_px
+    stroke = max(1, cell_px // 16)
+
+    with open(path, "w", encoding="utf-8") as out:
+        out.write(
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}" shape-rendering="crispEdges">\n'
+        )
+        out.write(f"<title>{html.escape(chart.get('title', 'Chart'))}</title>\n")
+        for x, y, w, h in iter_chart_tiles(chart, cell_px, tile_px):
+            parts = [f'<g id="tile-{x // tile_px}-{y // tile_px}">']
+            for rx, ry, rw, rh, (r, g, b) in _iter_cell_runs(chart, cell_px, x, y, w, h):
+                parts.append(f'<rect x="{rx}" y="{ry}" width="{rw}" height="{rh}" fill="#{r:02x}{g:02x}{b:02x}"/>')
+            lines = " ".join(
+                f"M{x1} {y1}L{x2} {y2}" for (x1, y1), (x2, y2) in _iter_grid_lines(cell_px, x, y, w, h)
+            )
+            if lines:
+                parts.append(f'<path d="{lines}" stroke="{CHART_GRID_COLOR}" stroke-width="{stroke}"/>')
+            parts.append("</g>\n")
+            out.write("".join(parts))
+        out.write("</svg>\n")
+
+
+def export_chart_pdf(chart: dict, path: str, cell_px: int = 8, tile_px: int = 512):
+    """
+    Writes the chart as a multi-page PDF, one tile per page (1 px = 1 pt),
+    pages in reading order. Each page is written as soon as it is drawn.
+    """
+    tiles = list(iter_chart_tiles(chart, cell_px, tile_px))
+    stroke = max(1, cell_px // 16)
+    grid_r, grid_g, grid_b = (c / 255 for c in _hex_rgb(CHART_GRID_COLOR))
+    offsets = {}
+
+    with open(path, "wb") as out:
+
+        def write_obj(num: int, body: bytes):
+            offsets[num] = out.tell()
+            out.write(f"{num} 0 obj\n".encode() + body + b"\nendobj\n")
+
+        out.write(b"%PDF-1.4\n")
+        # Objects: 1 catalog, 2 page tree, then (page, content) pairs per tile.
+        kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(tiles)))
+        write_obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        # Pages only draw filled rects and lines, so they inherit an empty /Resources.
+        write_obj(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(tiles)} /Resources << >> >>".encode())
+
+        for i, (x, y, w, h) in enumerate(tiles):
+            ops = []
+            last = None
+            for rx, ry, rw, rh, rgb in _iter_cell_runs(chart, cell_px, x, y, w, h):
+                if rgb != last:
+                    ops.append("{:.3f} {:.3f} {:.3f} rg".format(*(c / 255 for c in rgb)))
+                    last = rgb
+                # PDF y runs bottom-up
+                ops.append(f"{rx - x} {y + h - ry - rh} {rw} {rh} re f")
+            grid = list(_iter_grid_lines(cell_px, x, y, w, h))
+            if grid:
+                ops.append(f"{grid_r:.3f} {grid_g:.3f} {grid_b:.3f} RG {stroke} w")
+                for (x1, y1), (x2, y2) in grid:
+                    ops.append(f"{x1 - x} {y + h - y1} m {x2 - x} {y + h - y2} l")
+                ops.append("S")
+            content = "\n".join(ops).encode()
+
+            page_num, content_num = 3 + 2 * i, 4 + 2 * i
+            write_obj(
+                page_num,
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {w} {h}] "
+                f"/Contents {content_num} 0 R >>".encode(),
+            )
+            write_obj(
+                content_num,
+                f"<< /Length {len(content)} >>\nstream\n".encode() + content + b"\nendstream",
+            )
+
+        xref_at = out.tell()
+        count = 3 + 2 * len(tiles)
+        out.write(f"xref\n0 {count}\n0000000000 65535 f \n".encode())
+        for num in range(1, count):
+            out.write(f"{offsets[num]:010d} 00000 n \n".encode())
+        out.write(f"trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode())
+
+
 # ----------------------------
 # Program entry
 # ----------------------------
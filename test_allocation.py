@@ -0,0 +1,40 @@
+"""
+Regression checks for the yarn stash allocator (run with: python -m pytest).
+"""
+
+import time
+
+import pytest
+
+import CraftLogicCrochet_v0_1 as craftlogic
+
+
+def _pool(sizes, count):
+    return [{"weight": "#4", "color": "sage", "yards_per_skein": s, "count": count} for s in sizes]
+
+
+def _projects(n, width_in=40, height_in=50):
+    return [
+        {"name": f"order {i}", "width_in": width_in, "height_in": height_in, "weight": "#4", "color": "sage"}
+        for i in range(n)
+    ]
+
+
+def test_exact_is_bounded_on_a_twelve_size_pool():
+    # 12 distinct yardages used to take close to a minute for 4 projects.
+    inventory = _pool(range(150, 390, 20), 2)
+    projects = _projects(craftlogic.EXACT_MAX_PROJECTS)
+
+    start = time.perf_counter()
+    exact = craftlogic.allocate_stash(inventory, projects, "exact")
+    elapsed = time.perf_counter() - start
+
+    best_fit = craftlogic.allocate_stash(inventory, projects, "best_fit")
+    assert elapsed < 5
+    assert (len(exact["unfilled"]), exact["leftover_yd"]) <= (len(best_fit["unfilled"]), best_fit["leftover_yd"])
+
+
+def test_exact_rejects_too_many_skein_sizes():
+    inventory = _pool(range(150, 150 + craftlogic.EXACT_MAX_LOTS + 1), 1)
+    with pytest.raises(ValueError):
+        craftlogic.allocate_stash(inventory, _projects(1), "exact")